@@ -1,138 +1,222 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+import concurrent.futures
+import orjson
+import os
+import tempfile
 import time
-import json
 
 class LeetCodeContestScraper:
-    def __init__(self, contest_name: str, headless: bool = False):
+    CACHE_DIR = "cache"
+    CACHE_TTL = 300  # seconds a cached page stays valid while a contest is live
+    PAGE_SIZE = 25  # users per ranking page
+
+    def __init__(self, contest_name: str, use_cache: bool = True):
         self.contest_name = contest_name
         self.base_url = f"https://leetcode.com/contest/api/ranking/{contest_name}/"
-        
-        # Setup Chrome options
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        
+        self.use_cache = use_cache
+
+        # Pooled session with keep-alive + retry; the ranking endpoint is
+        # plain REST and needs no browser at all
+        self.session = requests.Session()
+        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+            "Referer": f"https://leetcode.com/contest/{contest_name}/ranking/",
+        })
+
     def login_manual(self):
-        """Open LeetCode for manual login"""
+        """Open a throwaway browser for manual login (only needed for gated contests)"""
+        # Selenium is imported lazily so the normal scrape path never
+        # pays for chromedriver
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
         print("\n" + "="*70)
         print("🔐 MANUAL LOGIN REQUIRED")
         print("="*70)
         print("\n1. A browser window will open")
         print("2. Please log in to your LeetCode account")
         print("3. After logging in, press Enter here to continue\n")
-        
-        self.driver.get("https://leetcode.com/accounts/login/")
-        input("Press Enter after you've logged in... ")
+
+        chrome_options = Options()
+        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+
+        driver = webdriver.Chrome(options=chrome_options)
+        try:
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            driver.get("https://leetcode.com/accounts/login/")
+            input("Press Enter after you've logged in... ")
+
+            # Copy the logged-in cookies into the requests session; the
+            # browser is done after this
+            for cookie in driver.get_cookies():
+                self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'])
+        finally:
+            driver.quit()
         print("✅ Login confirmed!\n")
-    
+
+    def _cache_path(self, page: int, region: str) -> str:
+        return os.path.join(self.CACHE_DIR, f"{self.contest_name}_{region}_{page}.json")
+
     def fetch_page_data(self, page: int, region: str = "global_v2") -> dict:
-        """Fetch page data using browser"""
-        url = f"{self.base_url}?pagination={page}&region={region}"
-        
+        """Fetch page data over the HTTP session (returns None on failure)"""
+        # Contest rankings are frozen once the contest ends (is_past in
+        # the API reply); anything cached mid-contest only stays valid
+        # for CACHE_TTL so reruns during a live contest see fresh ranks
+        cache_path = self._cache_path(page, region)
+        if self.use_cache and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    cached = orjson.loads(f.read())
+                if cached.get('is_past') or time.time() - os.path.getmtime(cache_path) < self.CACHE_TTL:
+                    return cached
+            except (orjson.JSONDecodeError, OSError):
+                pass  # corrupt cache entry — refetch
+
         try:
-            self.driver.get(url)
-            
-            # Get the page source (it's JSON)
-            body = self.driver.find_element(By.TAG_NAME, "body").text
-            data = json.loads(body)
-            return data
-            
-        except json.JSONDecodeError:
-            print(f"⚠️  Page {page}: Not valid JSON")
-            return None
-        except Exception as e:
-            print(f"❌ Page {page}: {e}")
+            response = self.session.get(
+                self.base_url,
+                params={"pagination": page, "region": region},
+                timeout=10
+            )
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+
+        except (orjson.JSONDecodeError, requests.RequestException):
             return None
+
+        if self.use_cache and data:
+            self._cache_store(cache_path, data)
+        return data
+
+    def _cache_store(self, cache_path: str, data: dict):
+        """Write a cache entry atomically (tempfile + rename)"""
+        try:
+            os.makedirs(self.CACHE_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.CACHE_DIR, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(data))
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # caching is best-effort
     
-    def parse_ranking_data(self, data: dict) -> list:
-        """Parse ranking data into list of dictionaries"""
-        if not data or 'total_rank' not in data:
-            return []
-        
-        rankings = []
-        for user in data['total_rank']:
-            user_data = {
-                'rank': user.get('rank'),
-                'username': user.get('username'),
-                'user_slug': user.get('user_slug'),
-                'country_code': user.get('country_code'),
-                'country_name': user.get('country_name'),
-                'score': user.get('score'),
-                'finish_time': user.get('finish_time'),
-                'data_region': user.get('data_region'),
-                'contest_id': user.get('contest_id')
-            }
-            
-            # Add submission details
-            submissions = user.get('submissions', {})
-            for problem_id, sub_info in submissions.items():
-                user_data[f'problem_{problem_id}_date'] = sub_info.get('date')
-                user_data[f'problem_{problem_id}_fail_count'] = sub_info.get('fail_count')
-                user_data[f'problem_{problem_id}_lang'] = sub_info.get('lang')
-                user_data[f'problem_{problem_id}_submission_id'] = sub_info.get('submission_id')
-            
-            rankings.append(user_data)
-        
-        return rankings
+    RANK_FIELDS = ['rank', 'username', 'user_slug', 'country_code', 'country_name',
+                   'score', 'finish_time', 'data_region', 'contest_id']
+
+    def parse_ranking_data(self, data: dict) -> pd.DataFrame:
+        """Parse ranking data into a per-page DataFrame"""
+        if not data or not data.get('total_rank'):
+            return pd.DataFrame()
+
+        users = data['total_rank']
+
+        # Base user fields in one vectorized pass (submissions stays a dict column)
+        df = pd.json_normalize(users, max_level=0)
+        df = df[[c for c in self.RANK_FIELDS if c in df.columns]]
+
+        # Problem ids repeat across every user in a contest, so format the
+        # problem_<id>_* column names once instead of per user
+        pids = list(dict.fromkeys(
+            pid for user in users for pid in (user.get('submissions') or ())))
+        keys = [(pid, f'problem_{pid}_date', f'problem_{pid}_fail_count',
+                 f'problem_{pid}_lang', f'problem_{pid}_submission_id')
+                for pid in pids]
+
+        # Flatten submission details into the precomputed columns
+        records = []
+        for user in users:
+            submissions = user.get('submissions') or {}
+            record = {}
+            for pid, k_date, k_fail, k_lang, k_sub in keys:
+                sub = submissions.get(pid)
+                if sub:
+                    record[k_date] = sub.get('date')
+                    record[k_fail] = sub.get('fail_count')
+                    record[k_lang] = sub.get('lang')
+                    record[k_sub] = sub.get('submission_id')
+            records.append(record)
+        subs = pd.DataFrame.from_records(records)
+
+        if not subs.empty:
+            df = pd.concat([df, subs], axis=1)
+        return df
     
-    def scrape_pages(self, min_page: int, max_page: int, region: str = "global_v2", delay: float = 0.05) -> pd.DataFrame:
-        """Scrape multiple pages"""
-        all_rankings = []
-        
+    def scrape_pages(self, min_page: int, max_page: int, region: str = "global_v2", max_workers: int = 16) -> pd.DataFrame:
+        """Scrape multiple pages concurrently over the shared session"""
         print(f"\n{'='*70}")
         print(f"🚀 Scraping pages {min_page} to {max_page} for '{self.contest_name}'")
         print(f"{'='*70}\n")
-        
-        for page in range(min_page, max_page + 1):
-            print(f"📄 Page {page:3d}...", end=" ", flush=True)
-            
-            data = self.fetch_page_data(page, region)
-            
-            if data:
-                rankings = self.parse_ranking_data(data)
-                if rankings:
-                    all_rankings.extend(rankings)
-                    print(f"✅ {len(rankings)} users")
-                else:
-                    print(f"⚠️  No users")
-            else:
-                print("❌ Failed")
-            
-            # Delay between requests
-            if page < max_page:
-                time.sleep(delay)
-        
-        if not all_rankings:
+
+        # Pages are independent GETs and the urllib3 pool is thread-safe,
+        # so overlap the network latency across a pool of workers. Pages
+        # go out one chunk at a time: a short page means the contest ran
+        # out of entrants, so later chunks are never submitted
+        results = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for chunk_start in range(min_page, max_page + 1, max_workers):
+                chunk_end = min(chunk_start + max_workers - 1, max_page)
+                futures = {
+                    executor.submit(self.fetch_page_data, page, region): page
+                    for page in range(chunk_start, chunk_end + 1)
+                }
+
+                end_of_data = False
+                for future in concurrent.futures.as_completed(futures):
+                    page = futures[future]
+                    data = future.result()
+
+                    if data:
+                        df_page = self.parse_ranking_data(data)
+                        if not df_page.empty:
+                            results[page] = df_page
+                            print(f"📄 Page {page:3d}... ✅ {len(df_page)} users")
+                        else:
+                            print(f"📄 Page {page:3d}... ⚠️  No users")
+                        if len(df_page) < self.PAGE_SIZE:
+                            end_of_data = True
+                    else:
+                        print(f"📄 Page {page:3d}... ❌ Failed")
+
+                if end_of_data and chunk_end < max_page:
+                    print(f"🏁 Reached end of rankings — skipping pages {chunk_end + 1} to {max_page}")
+                    break
+
+        if not results:
             print("\n❌ No data collected!")
             return pd.DataFrame()
-        
-        df = pd.DataFrame(all_rankings)
+
+        # Reassemble in page order so ranks stay sequential
+        frames = [results[page] for page in sorted(results)]
+        df = pd.concat(frames, ignore_index=True, copy=False)
         print(f"\n{'='*70}")
         print(f"✅ Collected {len(df)} total users")
         print(f"{'='*70}\n")
         return df
     
-    def save_to_csv(self, df: pd.DataFrame, min_page: int, max_page: int):
-        """Save to CSV"""
-        filename = f"leetcode_{self.contest_name}_page_{min_page}_to_{max_page}.csv"
-        df.to_csv(filename, index=False, encoding='utf-8-sig')
+    def save(self, df: pd.DataFrame, min_page: int, max_page: int, fmt: str = 'csv'):
+        """Save to CSV or Parquet"""
+        filename = f"leetcode_{self.contest_name}_page_{min_page}_to_{max_page}.{fmt}"
+        if fmt == 'parquet':
+            df.to_parquet(filename, engine='pyarrow', compression='zstd', index=False)
+        else:
+            df.to_csv(filename, index=False, encoding='utf-8-sig')
         print(f"💾 Saved to: {filename}\n")
         return filename
+
+    def save_to_csv(self, df: pd.DataFrame, min_page: int, max_page: int):
+        """Save to CSV"""
+        return self.save(df, min_page, max_page, fmt='csv')
     
     def close(self):
-        """Close browser"""
-        self.driver.quit()
+        """Close HTTP session"""
+        self.session.close()
 
 
 def main():
@@ -149,20 +233,24 @@ def main():
     max_page = int(input("📌 End page: "))
     region = input("📌 Region (default 'global_v2'): ").strip() or "global_v2"
     
-    headless = input("📌 Run in headless mode? (y/n, default n): ").strip().lower() == 'y'
-    
+    use_cache = input("📌 Use disk cache? (y/n, default y): ").strip().lower() != 'n'
+    need_login = input("📌 Log in first? (y/n, default n): ").strip().lower() == 'y'
+    fmt = input("📌 Output format (csv/parquet, default csv): ").strip().lower() or 'csv'
+
     scraper = None
     try:
-        scraper = LeetCodeContestScraper(contest_name, headless=headless)
-        
-        # Manual login
-        scraper.login_manual()
-        
+        scraper = LeetCodeContestScraper(contest_name, use_cache=use_cache)
+
+        # Manual login is only needed for gated contests
+        if need_login:
+            scraper.login_manual()
+
+
         # Scrape data
-        df = scraper.scrape_pages(min_page, max_page, region, delay=0)
+        df = scraper.scrape_pages(min_page, max_page, region)
         
         if not df.empty:
-            scraper.save_to_csv(df, min_page, max_page)
+            scraper.save(df, min_page, max_page, fmt)
             
             print("="*70)
             print("📊 PREVIEW:")
@@ -1,73 +1,110 @@
 import json
 import csv
 import os
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
 
 class LeetCodeSearch:
     def __init__(self):
-        self.usernames = []
-    
+        self._df = pd.DataFrame()
+        self._records = None
+        self._uname_lower = pd.Series(dtype=str)
+        self._lower = []
+        self._sorted_idx = []
+        self._sorted_keys = []
+
+    def __len__(self):
+        return len(self._df)
+
+    @property
+    def usernames(self):
+        """All rows as dicts, materialized lazily (search paths never need this)"""
+        if self._records is None:
+            self._records = self._df.to_dict('records')
+        return self._records
+
     def load_json(self, filename):
         """Load data from JSON file"""
         try:
             with open(filename, 'r', encoding='utf-8') as f:
-                self.usernames = json.load(f)
-            print(f"Loaded {len(self.usernames)} usernames from {filename}")
+                self._df = pd.DataFrame(json.load(f))
+            self._build_index()
+            print(f"Loaded {len(self)} usernames from {filename}")
             return True
         except Exception as e:
             print(f"Error loading {filename}: {e}")
             return False
-    
+
     def load_csv(self, filename):
-        """Load data from CSV file"""
+        """Load data from CSV file (C parser, columnar storage)"""
         try:
-            self.usernames = []
-            with open(filename, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    self.usernames.append(row)
-            print(f"Loaded {len(self.usernames)} usernames from {filename}")
+            self._df = pd.read_csv(filename, engine='c', low_memory=False)
+            self._build_index()
+            print(f"Loaded {len(self)} usernames from {filename}")
             return True
         except Exception as e:
             print(f"Error loading {filename}: {e}")
             return False
-    
+
+    def load_parquet(self, filename):
+        """Load data from Parquet file"""
+        try:
+            self._df = pd.read_parquet(filename)
+            self._build_index()
+            print(f"Loaded {len(self)} usernames from {filename}")
+            return True
+        except Exception as e:
+            print(f"Error loading {filename}: {e}")
+            return False
+
+    def _build_index(self):
+        """Precompute the lowercase names once plus a sorted view for prefix search"""
+        self._records = None
+
+        if 'username' in self._df.columns:
+            names = self._df['username'].fillna('').astype(str)
+        else:
+            names = pd.Series([''] * len(self._df), dtype=str)
+        self._uname_lower = names.str.lower()
+        self._lower = self._uname_lower.tolist()
+        self._sorted_idx = sorted(range(len(self._lower)), key=self._lower.__getitem__)
+        self._sorted_keys = [self._lower[i] for i in self._sorted_idx]
+
+        # Ranks parsed once into a sorted numpy array for range queries
+        if 'rank' in self._df.columns:
+            ranks = pd.to_numeric(self._df['rank'], errors='coerce').fillna(0)
+        else:
+            ranks = pd.Series(np.zeros(len(self._df)))
+        self._ranks = ranks.to_numpy(dtype=np.int32)
+        self._rank_order = np.argsort(self._ranks, kind='stable')
+        self._sorted_ranks = self._ranks[self._rank_order]
+
+    def _take(self, indices):
+        """Materialize row dicts only for the matched positions"""
+        indices = list(indices)
+        if not indices:
+            return []
+        return self._df.iloc[indices].to_dict('records')
+
     def search(self, query):
-        """Search for usernames containing the query"""
-        query = query.lower()
-        matches = []
-        
-        for user in self.usernames:
-            if query in user['username'].lower():
-                matches.append(user)
-        
-        return matches
-    
+        """Search for usernames containing the query (vectorized contains)"""
+        mask = self._uname_lower.str.contains(query.lower(), regex=False, na=False)
+        return self._take(np.flatnonzero(mask.to_numpy()))
+
     def search_starts_with(self, query):
-        """Search for usernames starting with query"""
+        """Search for usernames starting with query (binary search on the sorted index)"""
         query = query.lower()
-        matches = []
-        
-        for user in self.usernames:
-            if user['username'].lower().startswith(query):
-                matches.append(user)
-        
-        return matches
-    
+        lo = bisect_left(self._sorted_keys, query)
+        hi = bisect_left(self._sorted_keys, query + '\uffff')
+        return self._take(self._sorted_idx[lo:hi])
+
     def search_by_rank(self, min_rank, max_rank):
-        """Search by rank range"""
-        matches = []
-        
-        for user in self.usernames:
-            try:
-                rank = int(user.get('rank', 0))
-                if min_rank <= rank <= max_rank:
-                    matches.append(user)
-            except:
-                continue
-        
-        # Sort by rank
-        matches.sort(key=lambda x: int(x.get('rank', 0)))
-        return matches
+        """Search by rank range (binary search on the sorted rank array)"""
+        lo = np.searchsorted(self._sorted_ranks, min_rank)
+        hi = np.searchsorted(self._sorted_ranks, max_rank, side='right')
+        return self._take(self._rank_order[lo:hi])
     
     def display_results(self, matches, title="Search Results"):
         """Display search results"""
@@ -117,7 +154,7 @@ def main():
     searcher = LeetCodeSearch()
     
     # Try to find and load data file
-    data_files = [f for f in os.listdir('.') if f.endswith(('.json', '.csv')) and 'leetcode' in f.lower()]
+    data_files = [f for f in os.listdir('.') if f.endswith(('.json', '.csv', '.parquet')) and 'leetcode' in f.lower()]
     
     if data_files:
         print("Found these data files:")
@@ -137,6 +174,8 @@ def main():
         success = searcher.load_json(filename)
     elif filename.endswith('.csv'):
         success = searcher.load_csv(filename)
+    elif filename.endswith('.parquet'):
+        success = searcher.load_parquet(filename)
     else:
         print("Unsupported file format!")
         return
@@ -147,7 +186,7 @@ def main():
     # Interactive search
     while True:
         print("\n" + "="*50)
-        print(f"LEETCODE USERNAME SEARCH ({len(searcher.usernames)} users loaded)")
+        print(f"LEETCODE USERNAME SEARCH ({len(searcher)} users loaded)")
         print("="*50)
         print("1. Search username (contains)")
         print("2. Search username (starts with)")
@@ -201,8 +240,8 @@ def main():
         
         elif choice == "5":
             import random
-            sample = random.sample(searcher.usernames, min(20, len(searcher.usernames)))
-            searcher.display_results(sample, "Random 20 Users")
+            picks = random.sample(range(len(searcher)), min(20, len(searcher)))
+            searcher.display_results(searcher._take(picks), "Random 20 Users")
         
         elif choice == "6":
             export_file = input("Export all data to filename: ").strip()
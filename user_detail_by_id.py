@@ -1,9 +1,18 @@
 import requests
 import csv
+import orjson
 from datetime import datetime
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+# Only advertise brotli when the decoder is installed; urllib3 would
+# otherwise hand back raw br bytes that orjson can't parse
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
 # ======================================
 # Create reusable session with retry mechanism
 # ======================================
@@ -15,9 +24,21 @@ def create_session():
     session.headers.update({
         "Content-Type": "application/json",
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+        "Accept-Encoding": ACCEPT_ENCODING,
     })
     return session
 
+# Output schema of parse_user_data, pinned so CSVs are stable across runs
+PARSED_FIELDS = (
+    "username", "real_name", "country", "company", "school_college",
+    "ranking", "reputation", "star_rating", "about_me", "birthday",
+    "avatar", "websites", "skill_tags",
+    "easy_solved", "medium_solved", "hard_solved", "all_solved",
+    "easy_total_submissions", "medium_total_submissions",
+    "hard_total_submissions", "all_total_submissions",
+    "total_badges", "badge_names", "active_badge",
+)
+
 # GraphQL query
 QUERY = """
 query getUserProfile($username: String!) {
@@ -60,7 +81,7 @@ def fetch_user_data(session, user_slug):
         
         response = session.post(url, json=payload, timeout=10)
         response.raise_for_status()
-        data = response.json().get("data", {}).get("matchedUser")
+        data = orjson.loads(response.content).get("data", {}).get("matchedUser")
 
         if not data:
             print(f"❌ User '{user_slug}' not found!")
@@ -77,8 +98,11 @@ def fetch_user_data(session, user_slug):
 # Parse user data into flat dictionary
 # ======================================
 def parse_user_data(user):
-    profile = user.get("profile", {})
-    submit_stats = user.get("submitStats", {})
+    # `or {}` guards: the API returns null (not a missing key) for empty sections
+    profile = user.get("profile") or {}
+    stats = user.get("submitStats") or {}
+    badges = user.get("badges") or []
+    active_badge = user.get("activeBadge") or {}
 
     parsed = {
         "username": user.get("username", ""),
@@ -92,29 +116,20 @@ def parse_user_data(user):
         "about_me": profile.get("aboutMe", ""),
         "birthday": profile.get("birthday", ""),
         "avatar": profile.get("userAvatar", ""),
-        "websites": "; ".join(profile.get("websites", []) or []),
-        "skill_tags": "; ".join(profile.get("skillTags", []) or []),
+        "websites": "; ".join(profile.get("websites") or []),
+        "skill_tags": "; ".join(profile.get("skillTags") or []),
+        "total_badges": len(badges),
+        "badge_names": "; ".join(b.get("displayName", "") for b in badges[:10]),
+        "active_badge": active_badge.get("displayName", ""),
     }
 
-    # Add solved counts
-    for item in submit_stats.get("acSubmissionNum", []):
-        difficulty = item["difficulty"].lower()
-        parsed[f"{difficulty}_solved"] = item["count"]
-    
-    # Add total submission counts
-    for item in submit_stats.get("totalSubmissionNum", []):
-        difficulty = item["difficulty"].lower()
-        parsed[f"{difficulty}_total_submissions"] = item["count"]
-
-    # Add badge information
-    badges = user.get("badges", [])
-    parsed["total_badges"] = len(badges)
-    parsed["badge_names"] = "; ".join(b.get("displayName", "") for b in badges[:10])
-    
-    active_badge = user.get("activeBadge")
-    parsed["active_badge"] = active_badge.get("displayName", "") if active_badge else ""
+    # Solved / total submission counts per difficulty
+    solved = {f"{i['difficulty'].lower()}_solved": i["count"]
+              for i in stats.get("acSubmissionNum") or ()}
+    totals = {f"{i['difficulty'].lower()}_total_submissions": i["count"]
+              for i in stats.get("totalSubmissionNum") or ()}
 
-    return parsed
+    return {**parsed, **solved, **totals}
 
 # ======================================
 # Display user data
@@ -164,13 +179,11 @@ def save_to_csv(parsed_data, filename=None):
         filename = f"leetcode_{username}_{timestamp}.csv"
     
     try:
-        fieldnames = sorted(parsed_data.keys())
-        
         with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerow(parsed_data)
-        
+            writer = csv.writer(f)
+            writer.writerow(PARSED_FIELDS)
+            writer.writerow([parsed_data.get(k, '') for k in PARSED_FIELDS])
+
         print(f"\n💾 Data saved to: {filename}")
         return filename
     
@@ -1,17 +1,42 @@
-import requests
+import aiohttp
+import asyncio
 import csv
-import time
+import orjson
 import os
-from datetime import datetime
 
-def fetch_leetcode_user_data(user_slug):
-    """
-    Fetch LeetCode user profile data using GraphQL API
-    """
-    url = "https://leetcode.com/graphql"
-    
-    # GraphQL query to fetch user data
-    query = """
+GRAPHQL_URL = "https://leetcode.com/graphql"
+
+# One event loop multiplexes all in-flight requests; this caps the
+# number of open connections, not threads
+MAX_CONCURRENCY = 50
+
+# Only advertise brotli when the decoder is installed; aiohttp raises
+# ContentEncodingError on a br response it can't decompress
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+
+# Known output schema of parse_user_data, so the CSV header can be fixed
+# up front instead of union-scanning every buffered row
+PARSED_FIELDS = (
+    'username', 'real_name', 'country', 'company', 'school_college',
+    'ranking', 'reputation', 'star_rating', 'about_me',
+    'easy_solved', 'medium_solved', 'hard_solved', 'all_solved',
+    'easy_total_submissions', 'medium_total_submissions',
+    'hard_total_submissions', 'all_total_submissions',
+    'total_badges', 'badge_names', 'active_badge',
+)
+
+# Full profile query (kept for reference / one-off debugging)
+QUERY_FULL = """
     query getUserProfile($username: String!) {
         matchedUser(username: $username) {
             username
@@ -51,33 +76,67 @@ def fetch_leetcode_user_data(user_slug):
             }
         }
     }
-    """
-    
-    variables = {"username": user_slug}
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Referer": f"https://leetcode.com/{user_slug}/",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+"""
+
+# Slim query for the bulk path: only the fields that end up in the CSV.
+# Avatars, websites, skill tags and badge icons were fetched and dropped.
+QUERY_SLIM = """
+    query getUserProfile($username: String!) {
+        matchedUser(username: $username) {
+            username
+            profile {
+                realName
+                ranking
+                reputation
+                countryName
+                company
+                school
+                aboutMe
+                starRating
+            }
+            submitStats {
+                acSubmissionNum {
+                    difficulty
+                    count
+                }
+                totalSubmissionNum {
+                    difficulty
+                    count
+                }
+            }
+            badges {
+                displayName
+            }
+            activeBadge {
+                displayName
+            }
+        }
     }
-    
+"""
+
+async def fetch_leetcode_user_data(session, user_slug):
+    """
+    Fetch LeetCode user profile data using GraphQL API
+    """
+    payload = {"query": QUERY_SLIM, "variables": {"username": user_slug}}
+
     try:
-        response = requests.post(
-            url,
-            json={"query": query, "variables": variables},
-            headers=headers,
-            timeout=10
-        )
-        response.raise_for_status()
-        data = response.json()
-        
+        async with session.post(
+            GRAPHQL_URL,
+            json=payload,
+            headers={"Referer": f"https://leetcode.com/{user_slug}/"},
+            timeout=aiohttp.ClientTimeout(total=10)
+        ) as response:
+            response.raise_for_status()
+            data = orjson.loads(await response.read())
+
         if data.get("data", {}).get("matchedUser") is None:
             print(f"  ⚠️  User '{user_slug}' not found!")
             return None
-            
+
         return data["data"]["matchedUser"]
-    
-    except requests.exceptions.RequestException as e:
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         print(f"  ❌ Error fetching data for '{user_slug}': {e}")
         return None
 
@@ -87,10 +146,13 @@ def parse_user_data(user_data):
     """
     if not user_data:
         return {}
-    
-    profile = user_data.get("profile", {})
-    submit_stats = user_data.get("submitStats", {})
-    
+
+    # `or {}` guards: the API returns null (not a missing key) for empty sections
+    profile = user_data.get("profile") or {}
+    stats = user_data.get("submitStats") or {}
+    badges = user_data.get("badges") or []
+    active_badge = user_data.get("activeBadge") or {}
+
     parsed = {
         "username": user_data.get("username", ""),
         "real_name": profile.get("realName", ""),
@@ -103,35 +165,20 @@ def parse_user_data(user_data):
         "about_me": profile.get("aboutMe", ""),
         "birthday": profile.get("birthday", ""),
         "avatar": profile.get("userAvatar", ""),
-        "websites": "; ".join(profile.get("websites", [])) if profile.get("websites") else "",
-        "skill_tags": "; ".join(profile.get("skillTags", [])) if profile.get("skillTags") else "",
+        "websites": "; ".join(profile.get("websites") or []),
+        "skill_tags": "; ".join(profile.get("skillTags") or []),
+        "total_badges": len(badges),
+        "badge_names": "; ".join(b.get("displayName", "") for b in badges[:10]),  # First 10 badges
+        "active_badge": active_badge.get("displayName", ""),
     }
-    
-    # Add submission stats
-    if submit_stats.get('acSubmissionNum'):
-        for item in submit_stats['acSubmissionNum']:
-            difficulty = item.get('difficulty', 'Unknown')
-            count = item.get('count', 0)
-            parsed[f"{difficulty.lower()}_solved"] = count
-    
-    if submit_stats.get('totalSubmissionNum'):
-        for item in submit_stats['totalSubmissionNum']:
-            difficulty = item.get('difficulty', 'Unknown')
-            count = item.get('count', 0)
-            parsed[f"{difficulty.lower()}_total_submissions"] = count
-    
-    # Add badges info
-    badges = user_data.get("badges", [])
-    parsed["total_badges"] = len(badges)
-    parsed["badge_names"] = "; ".join([b.get("displayName", "") for b in badges[:10]])  # First 10 badges
-    
-    active_badge = user_data.get("activeBadge")
-    if active_badge:
-        parsed["active_badge"] = active_badge.get("displayName", "")
-    else:
-        parsed["active_badge"] = ""
-    
-    return parsed
+
+    # Solved / total submission counts per difficulty
+    solved = {f"{i['difficulty'].lower()}_solved": i.get("count", 0)
+              for i in stats.get("acSubmissionNum") or ()}
+    totals = {f"{i['difficulty'].lower()}_total_submissions": i.get("count", 0)
+              for i in stats.get("totalSubmissionNum") or ()}
+
+    return {**parsed, **solved, **totals}
 
 def process_csv_file(input_filename):
     """
@@ -145,59 +192,66 @@ def process_csv_file(input_filename):
         # Read input CSV
         with open(input_filename, 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
+            input_fields = reader.fieldnames or []
             rows = list(reader)
-        
+
         print(f"\n📊 Found {len(rows)} users in the CSV file")
         print(f"🎯 Will fetch data and save to: {output_filename}")
         print("="*70)
-        
-        # Collect all user data
-        all_user_data = []
-        
-        for idx, row in enumerate(rows, 1):
-            user_slug = row.get('user_slug', '').strip()
-            
-            if not user_slug:
-                print(f"\n[{idx}/{len(rows)}] ⚠️  Empty user_slug, skipping...")
-                continue
-            
-            print(f"\n[{idx}/{len(rows)}] 🔍 Fetching data for: {user_slug}")
-            
-            # Fetch user data
-            user_data = fetch_leetcode_user_data(user_slug)
-            
-            if user_data:
-                parsed_data = parse_user_data(user_data)
-                # Merge original row data with fetched user data
-                combined_data = {**row, **parsed_data}
-                all_user_data.append(combined_data)
-                print(f"  ✅ Successfully fetched data")
-            else:
-                # Still add the row with empty user info fields
-                all_user_data.append(row)
-                print(f"  ⚠️  Added row with missing user info")
-            
 
-        
-        # Write to output CSV
-        if all_user_data:
-            # Get all unique fieldnames from all rows
-            all_fieldnames = set()
-            for data in all_user_data:
-                all_fieldnames.update(data.keys())
-            
-            fieldnames = sorted(list(all_fieldnames))
-            
-            with open(output_filename, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(all_user_data)
-            
+        # Fixed output schema: input columns plus the known parsed fields,
+        # so rows can stream to disk as they arrive instead of buffering
+        fieldnames = list(input_fields) + [f for f in PARSED_FIELDS if f not in input_fields]
+        written = 0
+
+        with open(output_filename, 'w', newline='', encoding='utf-8') as out:
+            writer = csv.writer(out)
+            writer.writerow(fieldnames)
+
+            # All fetches multiplex over one aiohttp session on a single
+            # event loop; rows stream to the writer as each one finishes
+            async def fetch_all():
+                nonlocal written
+
+                async def fetch_row(idx, slug):
+                    return idx, await fetch_leetcode_user_data(session, slug)
+
+                connector = aiohttp.TCPConnector(limit=MAX_CONCURRENCY, ttl_dns_cache=300)
+                async with aiohttp.ClientSession(connector=connector, headers=HEADERS) as session:
+                    tasks = []
+                    for idx, row in enumerate(rows):
+                        user_slug = row.get('user_slug', '').strip()
+
+                        if not user_slug:
+                            print(f"[{idx + 1}/{len(rows)}] ⚠️  Empty user_slug, skipping...")
+                            continue
+
+                        tasks.append(asyncio.ensure_future(fetch_row(idx, user_slug)))
+
+                    for done, task in enumerate(asyncio.as_completed(tasks), 1):
+                        idx, user_data = await task
+                        row = rows[idx]
+
+                        if user_data:
+                            # Merge original row data with fetched user data
+                            combined = {**row, **parse_user_data(user_data)}
+                            writer.writerow([combined.get(k, '') for k in fieldnames])
+                            print(f"[{done}/{len(tasks)}] ✅ {row.get('user_slug', '').strip()}")
+                        else:
+                            # Still write the row with empty user info fields
+                            writer.writerow([row.get(k, '') for k in fieldnames])
+                            print(f"[{done}/{len(tasks)}] ⚠️  {row.get('user_slug', '').strip()} (missing user info)")
+                        written += 1
+
+            asyncio.run(fetch_all())
+
+        if written:
             print("\n" + "="*70)
             print(f"✅ SUCCESS! Data saved to: {output_filename}")
-            print(f"📊 Total users processed: {len(all_user_data)}")
+            print(f"📊 Total users processed: {written}")
             print("="*70)
         else:
+            os.remove(output_filename)
             print("\n❌ No data to save!")
             
     except FileNotFoundError: